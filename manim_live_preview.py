@@ -1,13 +1,18 @@
 import argparse
+import ast
+import json
 import os
+import re
 import sys
 import subprocess
 import shutil
+import signal
 import time
-import webbrowser
-import importlib.util
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from html import escape
 from pathlib import Path
+from queue import Queue, Empty
+from string import Template
 from threading import Lock, Event, Thread
 from typing import Optional, List, Dict
 
@@ -34,8 +39,53 @@ class Target:
     preview_path: Path
     log_path: Path
     lock: Lock
-    last_build_t: float = 0.0
     root_dir: Path = None
+    rebuild_running: bool = False
+    rebuild_pending: bool = False
+    last_hash: Optional[bytes] = None
+    worker_proc: Optional[subprocess.Popen] = None
+    name_html: str = field(init=False, repr=False)
+    src_html: str = field(init=False, repr=False)
+    scene_html: str = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.name_html = escape(self.name)
+        self.src_html = escape(os.path.basename(self.src))
+        self.scene_html = escape(self.scene)
+
+# 不参与监听和源码摘要的目录名；PyChangeHandler 的忽略规则也由它生成，两边始终一致
+SKIP_DIRS = {".git", ".hg", ".svn", ".venv", "venv", ".tox", "__pycache__", "node_modules"}
+
+_file_digests: Dict[str, tuple] = {}   # path -> (st_mtime_ns, st_size, digest)
+
+def _file_digest(path: str) -> bytes:
+    # 以 (mtime, size) 为键缓存单个文件的摘要：未改动的文件只需一次 stat，不再重读内容
+    st = os.stat(path)
+    cached = _file_digests.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    import hashlib
+    with open(path, "rb") as f:
+        digest = hashlib.blake2b(f.read(), digest_size=16).digest()
+    _file_digests[path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+def source_digest(t: Target) -> bytes:
+    # 监听会因 root_dir 下任意 .py 变更而触发，所以摘要覆盖源文件和 root_dir 下全部 .py
+    import hashlib
+    h = hashlib.blake2b(digest_size=16)
+    h.update(_file_digest(t.src))
+    for dirpath, dirnames, filenames in os.walk(t.root_dir):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for fn in sorted(filenames):
+            if fn.endswith(".py"):
+                path = os.path.join(dirpath, fn)
+                h.update(path.encode("utf-8", "surrogateescape") + b"\0")
+                try:
+                    h.update(_file_digest(path))
+                except OSError:
+                    pass
+    return h.digest()
 
 def check_bin(bin_name: str) -> bool:
     from shutil import which
@@ -58,8 +108,25 @@ def ensure_deps():
     if not check_bin("ffmpeg"):
         warn("未检测到 ffmpeg。Manim 导出视频通常需要它，建议安装：https://ffmpeg.org")
 
+def _is_scene_base(b) -> bool:
+    if isinstance(b, ast.Name):
+        return b.id.endswith("Scene")
+    if isinstance(b, ast.Attribute):
+        return b.attr.endswith("Scene")
+    return False
+
 def autodetect_scene(src_path: str) -> Optional[str]:
+    # 优先静态解析源码，避免导入 manim 与执行用户代码。
+    # 解析失败、或没有基类名以 Scene 结尾的类（如 class Demo(MyBase)）时，才退回到导入模块检测
     try:
+        tree = ast.parse(Path(src_path).read_text(encoding="utf-8"))
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and any(_is_scene_base(b) for b in node.bases):
+                return node.name
+    except Exception as e:
+        warn(f"静态解析场景失败，改为导入模块检测：{e}")
+    try:
+        import importlib.util
         spec = importlib.util.spec_from_file_location("manim_src_module", src_path)
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)  # type: ignore
@@ -74,18 +141,29 @@ def autodetect_scene(src_path: str) -> Optional[str]:
         warn(f"自动检测场景失败：{e}")
     return None
 
+def log_header(desc: str) -> str:
+    return ("\n" + "=" * 80 + "\n"
+            + time.strftime("[%Y-%m-%d %H:%M:%S] ") + desc + "\n"
+            + "=" * 80 + "\n")
+
 def run_and_log(cmd: List[str], log_path: Path, verbose: bool) -> int:
     print(color("[cmd] ", "magenta") + " ".join(cmd))
     log_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(log_path, "a", encoding="utf-8") as lf:
-        lf.write("\n" + "=" * 80 + "\n")
-        lf.write(time.strftime("[%Y-%m-%d %H:%M:%S] ") + " ".join(cmd) + "\n")
-        lf.write("=" * 80 + "\n")
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    with open(log_path, "ab") as lf:
+        lf.write(log_header(" ".join(cmd)).encode("utf-8"))
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, bufsize=0)
+        # 按块读取原始字节转发，避免逐行解码 + 逐行 print/write（DEBUG 日志可达数千行）
+        fd = proc.stdout.fileno()
+        sys.stdout.flush()
+        out = sys.stdout.buffer
         try:
-            for line in proc.stdout:
-                print(line, end="")
-                lf.write(line)
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                out.write(chunk)
+                out.flush()
+                lf.write(chunk)
         except KeyboardInterrupt:
             proc.terminate()
             raise
@@ -93,7 +171,7 @@ def run_and_log(cmd: List[str], log_path: Path, verbose: bool) -> int:
 
 def tail_log(log_path: Path, n=80):
     try:
-        with open(log_path, "r", encoding="utf-8") as f:
+        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
             lines = f.readlines()
         print(color(f"\n--- {log_path.name} 最近日志（tail） ---\n", "blue"))
         for line in lines[-n:]:
@@ -102,40 +180,262 @@ def tail_log(log_path: Path, n=80):
     except Exception:
         pass
 
+def _iter_mp4s(root: Path):
+    # DirEntry 的 is_dir/is_file 直接使用 readdir 返回的类型，只有 .mp4 才需要 stat 取 mtime
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".mp4") and entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat().st_mtime
+        except OSError:
+            continue
+
 def find_latest_mp4(root: Path) -> Optional[Path]:
     try:
-        mp4s = sorted(root.rglob("*.mp4"), key=lambda p: p.stat().st_mtime, reverse=True)
-        return mp4s[0] if mp4s else None
-    except Exception:
+        return Path(max(_iter_mp4s(root), key=lambda item: item[1])[0])
+    except (ValueError, OSError):
         return None
 
-def render_target(t: Target, verbose: bool) -> bool:
-    quality_flag = f"-{t.quality}"
-    manim_cmd = [
-        sys.executable, "-m", "manim",
-        t.src, t.scene,
-        quality_flag,                         # -ql / -qm / -qh
-        "--media_dir", str(t.media_dir),
-        "--output_file", t.name,
-        "-v", "DEBUG" if verbose else "WARNING",
-        "--disable_caching",
-    ]
+QUALITY_NAMES = {"ql": "low_quality", "qm": "medium_quality", "qh": "high_quality"}
+
+_manim_mod = None
+_manim_lock = Lock()   # manim 的 config 是全局的，进程内渲染必须串行
+_scene_modules: Dict[str, tuple] = {}   # src -> (module, {文件: mtime_ns})
+_local_modules: Dict[str, str] = {}     # 场景执行期间首次导入的本地模块：模块名 -> 文件
+_python_dirs = None
+
+def _get_manim():
+    global _manim_mod
+    if _manim_mod is None:
+        import importlib
+        _manim_mod = importlib.import_module("manim")
+    return _manim_mod
+
+def _norm_path(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+def _is_local_file(path: str, root_prefix: str) -> bool:
+    # 位于场景目录下、且不属于 Python 安装本身（标准库 / site-packages）的文件才算用户的本地模块
+    global _python_dirs
+    if _python_dirs is None:
+        import sysconfig
+        paths = sysconfig.get_paths()
+        dirs = {sys.prefix, sys.base_prefix, sys.exec_prefix,
+                paths["stdlib"], paths["platstdlib"], paths["purelib"], paths["platlib"]}
+        _python_dirs = tuple(_norm_path(d) + os.sep for d in dirs if d)
+    p = _norm_path(os.path.abspath(path))
+    return (p.startswith(root_prefix) and not p.startswith(_python_dirs)
+            and "site-packages" not in p and "dist-packages" not in p)
+
+def _local_stamps(src: str, root_prefix: str) -> Dict[str, Optional[int]]:
+    files = {src} | {f for f in _local_modules.values() if _norm_path(f).startswith(root_prefix)}
+    stamps = {}
+    for f in files:
+        try:
+            stamps[f] = os.stat(f).st_mtime_ns
+        except OSError:
+            stamps[f] = None
+    return stamps
+
+def _record_local_modules(src: str, before: dict):
+    # 记下场景执行/渲染期间新导入的本地模块（import helper 之类），并补记它们的 mtime；
+    # 执行前就已存在的模块（标准库、manim 等）不在此列，之后也不会被清理
+    root_prefix = _norm_path(os.path.dirname(src)) + os.sep
+    for name, mod in list(sys.modules.items()):
+        if before.get(name) is mod:
+            continue
+        f = getattr(mod, "__file__", None)
+        if f and _is_local_file(f, root_prefix):
+            _local_modules[name] = f
+    cached = _scene_modules.get(src)
+    if cached:
+        for f, mtime in _local_stamps(src, root_prefix).items():
+            cached[1].setdefault(f, mtime)
+
+def _load_scene_module(src: str):
+    # 场景文件及其导入过的本地模块都未改动时才复用缓存
+    src_dir = os.path.dirname(src)
+    root_prefix = _norm_path(src_dir) + os.sep
+    cached = _scene_modules.get(src)
+    if cached and cached[1] == _local_stamps(src, root_prefix):
+        return cached[0]
+    # 先从 sys.modules 清掉之前导入的本地模块，重新执行时 import 才会读到新代码
+    for name, f in list(_local_modules.items()):
+        if _norm_path(f).startswith(root_prefix):
+            sys.modules.pop(name, None)
+            del _local_modules[name]
+    stamps = _local_stamps(src, root_prefix)
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    mod_name = f"manim_src_{abs(hash(src)):x}"
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(mod_name, src)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[mod_name] = module
+    try:
+        spec.loader.exec_module(module)  # type: ignore
+    except Exception:
+        sys.modules.pop(mod_name, None)
+        raise
+    _scene_modules[src] = (module, stamps)
+    return module
+
+def manim_config(t: Target, verbose: bool) -> dict:
+    return {
+        "quality": QUALITY_NAMES[t.quality],
+        "input_file": t.src,
+        "media_dir": str(t.media_dir),
+        "output_file": t.name,
+        "verbosity": "DEBUG" if verbose else "WARNING",
+        "disable_caching": True,
+    }
+
+def _render_scene(src: str, scene: str, config: dict):
+    manim = _get_manim()
+    before = dict(sys.modules)
+    try:
+        scene_cls = getattr(_load_scene_module(src), scene)
+        with manim.tempconfig(config):
+            scene_cls().render()
+    finally:
+        _record_local_modules(src, before)
+
+def render_in_process(t: Target, verbose: bool) -> int:
+    print(color("[render] ", "magenta") + f"{t.src}:{t.scene}（进程内）")
+    t.log_path.parent.mkdir(parents=True, exist_ok=True)
+    with _manim_lock, open(t.log_path, "a", encoding="utf-8") as lf:
+        lf.write(log_header(f"in-process {t.src} {t.scene}"))
+        import logging
+        import traceback
+        log_handler = logging.StreamHandler(lf)
+        logger = logging.getLogger("manim")
+        logger.addHandler(log_handler)
+        try:
+            _render_scene(t.src, t.scene, manim_config(t, verbose))
+            return 0
+        except Exception:
+            lf.write(traceback.format_exc())
+            return 1
+        finally:
+            logger.removeHandler(log_handler)
+
+def worker_main():
+    # 常驻渲染进程的主循环：stdin 每行一个 JSON 请求，原 stdout 只用于回写 JSON 结果，
+    # manim 自身的输出全部改道到 stderr（即该目标的日志文件）
+    import traceback
+    proto = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    _get_manim()
+    for line in sys.stdin:
+        req = json.loads(line)
+        try:
+            _render_scene(req["src"], req["scene"], req["config"])
+            resp = {"ok": True}
+        except Exception:
+            traceback.print_exc()
+            resp = {"ok": False}
+        sys.stdout.flush()
+        sys.stderr.flush()
+        proto.write(json.dumps(resp) + "\n")
+        proto.flush()
+
+WORKER_FLAG = "--_serve-worker"
+
+def start_worker(t: Target):
+    # 直接以本脚本文件启动，不依赖模块名，脚本改名或同目录有同名模块都不受影响
+    t.log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(t.log_path, "ab") as lf:
+        t.worker_proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), WORKER_FLAG],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=lf,
+            text=True, encoding="utf-8", bufsize=1,
+        )
+
+def stop_worker(t: Target):
+    proc, t.worker_proc = t.worker_proc, None
+    if proc is None:
+        return
+    try:
+        proc.stdin.close()
+        # 空闲的常驻进程读到 EOF 会立即退出；正在渲染的结果反正要丢弃，不必等它跑完
+        proc.wait(timeout=0.5)
+    except Exception:
+        proc.kill()
+
+def render_via_worker(t: Target, verbose: bool) -> int:
+    if t.worker_proc.poll() is not None:
+        warn(f"[{t.name}] 渲染进程已退出（退出码 {t.worker_proc.returncode}），正在重启…")
+        start_worker(t)
+    print(color("[render] ", "magenta") + f"{t.src}:{t.scene}（常驻进程 pid={t.worker_proc.pid}）")
+    with open(t.log_path, "a", encoding="utf-8") as lf:
+        lf.write(log_header(f"worker {t.src} {t.scene}"))
+    req = {"src": t.src, "scene": t.scene, "config": manim_config(t, verbose)}
+    try:
+        t.worker_proc.stdin.write(json.dumps(req) + "\n")
+        t.worker_proc.stdin.flush()
+        line = t.worker_proc.stdout.readline()
+    except OSError:
+        line = ""
+    if not line:
+        return 1
+    return 0 if json.loads(line).get("ok") else 1
+
+QUALITY_DIRS = {"ql": "480p15", "qm": "720p30", "qh": "1080p60"}
+
+def find_output_mp4(t: Target) -> Optional[Path]:
+    # manim 的输出路径由 media_dir / output_file / 质量唯一确定，无需遍历整个 media_dir
+    out_dir = t.media_dir / "videos" / Path(t.src).stem / QUALITY_DIRS[t.quality]
+    expected = out_dir / f"{t.name}.mp4"
+    if expected.exists():
+        return expected
+    try:
+        with os.scandir(out_dir) as it:
+            mp4s = [e for e in it if e.name.endswith(".mp4") and e.is_file()]
+        if mp4s:
+            return Path(max(mp4s, key=lambda e: e.stat().st_mtime).path)
+    except OSError:
+        pass
+    return find_latest_mp4(t.media_dir)
+
+def render_target(t: Target, verbose: bool, use_subprocess: bool = False) -> bool:
     t0 = time.time()
-    code = run_and_log(manim_cmd, t.log_path, verbose)
+    if t.worker_proc is not None:
+        code = render_via_worker(t, verbose)
+    elif use_subprocess:
+        quality_flag = f"-{t.quality}"
+        manim_cmd = [
+            sys.executable, "-m", "manim",
+            t.src, t.scene,
+            quality_flag,                         # -ql / -qm / -qh
+            "--media_dir", str(t.media_dir),
+            "--output_file", t.name,
+            "-v", "DEBUG" if verbose else "WARNING",
+            "--disable_caching",
+        ]
+        code = run_and_log(manim_cmd, t.log_path, verbose)
+    else:
+        code = render_in_process(t, verbose)
     dt = time.time() - t0
     if code != 0:
         err(f"[{t.name}] 渲染失败（退出码 {code}，耗时 {dt:.2f}s）。")
         tail_log(t.log_path)
         return False
 
-    latest = find_latest_mp4(t.media_dir)
+    latest = find_output_mp4(t)
     if not latest or not latest.exists():
         err(f"[{t.name}] 未找到 MP4 产物，请检查日志：{t.log_path}")
         tail_log(t.log_path)
         return False
 
     try:
-        shutil.copyfile(latest, t.preview_path)
+        # 先写临时文件再原子替换，浏览器不会读到写了一半的 MP4
+        tmp = t.preview_path.with_suffix(".mp4.tmp")
+        shutil.copyfile(latest, tmp)
+        os.replace(tmp, t.preview_path)
         ok(f"[{t.name}] 预览更新：{t.preview_path} （用时 {dt:.2f}s）")
     except Exception as e:
         err(f"[{t.name}] 复制 MP4 失败：{e}")
@@ -143,7 +443,8 @@ def render_target(t: Target, verbose: bool) -> bool:
         return False
     return True
 
-DASHBOARD_TEMPLATE = """<!doctype html>
+# 用 string.Template（$占位符）而不是 str.format：CSS/JS 中的花括号无需转义，也无需逐个扫描
+DASHBOARD_TEMPLATE = Template("""<!doctype html>
 <html lang="zh">
 <head>
   <meta charset="utf-8" />
@@ -153,24 +454,24 @@ DASHBOARD_TEMPLATE = """<!doctype html>
   <meta http-equiv="Pragma" content="no-cache"/>
   <meta http-equiv="Expires" content="0"/>
   <style>
-    :root {{
+    :root {
       --bg: #0e0f12; --fg: #eaeaea; --card: #15171c; --muted: #9aa0a6; --accent: #ffd166;
-    }}
-    * {{ box-sizing: border-box; }}
-    html, body {{ margin:0; padding:0; background:var(--bg); color:var(--fg); font-family: ui-sans-serif, system-ui, -apple-system, "Segoe UI", Roboto, "Noto Sans", Arial, "Microsoft YaHei", sans-serif; }}
-    header {{ position: sticky; top: 0; background: var(--bg); border-bottom: 1px solid #2a2d34; padding: 10px 16px; display:flex; align-items: baseline; gap:12px; z-index:10; }}
-    h1 {{ margin:0; font-size: 18px; color: var(--accent); }}
-    .sub {{ font-size: 13px; color: var(--muted); }}
-    main {{ padding: 16px; }}
-    .grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(360px, 1fr)); gap: 16px; }}
-    .card {{ background: var(--card); border: 1px solid #262a32; border-radius: 12px; box-shadow: 0 10px 30px rgba(0,0,0,.35); overflow:hidden; }}
-    .card header {{ display:flex; justify-content:space-between; align-items:center; padding: 10px 12px; border:0; border-bottom: 1px solid #262a32; }}
-    .title {{ font-weight: 600; }}
-    .meta {{ font-size: 12px; color: var(--muted); }}
-    .player {{ display:grid; place-items:center; background:#000; }}
-    video {{ width:100%; height: auto; max-height: 70vh; outline:none; display:block; }}
-    .hint {{ position: fixed; bottom: 12px; left: 16px; font-size: 12px; color: var(--muted); }}
-    code {{ color:#8ecae6; }}
+    }
+    * { box-sizing: border-box; }
+    html, body { margin:0; padding:0; background:var(--bg); color:var(--fg); font-family: ui-sans-serif, system-ui, -apple-system, "Segoe UI", Roboto, "Noto Sans", Arial, "Microsoft YaHei", sans-serif; }
+    header { position: sticky; top: 0; background: var(--bg); border-bottom: 1px solid #2a2d34; padding: 10px 16px; display:flex; align-items: baseline; gap:12px; z-index:10; }
+    h1 { margin:0; font-size: 18px; color: var(--accent); }
+    .sub { font-size: 13px; color: var(--muted); }
+    main { padding: 16px; }
+    .grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(360px, 1fr)); gap: 16px; }
+    .card { background: var(--card); border: 1px solid #262a32; border-radius: 12px; box-shadow: 0 10px 30px rgba(0,0,0,.35); overflow:hidden; }
+    .card header { display:flex; justify-content:space-between; align-items:center; padding: 10px 12px; border:0; border-bottom: 1px solid #262a32; }
+    .title { font-weight: 600; }
+    .meta { font-size: 12px; color: var(--muted); }
+    .player { display:grid; place-items:center; background:#000; }
+    video { width:100%; height: auto; max-height: 70vh; outline:none; display:block; }
+    .hint { position: fixed; bottom: 12px; left: 16px; font-size: 12px; color: var(--muted); }
+    code { color:#8ecae6; }
   </style>
 </head>
 <body>
@@ -180,38 +481,74 @@ DASHBOARD_TEMPLATE = """<!doctype html>
   </header>
   <main>
     <div class="grid">
-      {cards}
+      $cards
     </div>
   </main>
-  <div class="hint">日志目录：<code>{log_dir}</code></div>
-  <script src="/livereload.js?port={port}&mindelay=300&v=2"></script>
+  <div class="hint">日志目录：<code>$log_dir</code></div>
+  <script src="/livereload.js?port=$port&mindelay=300&v=2"></script>
+  <script>
+    // 轮询 manifest.json，只替换时间戳变化的那张卡片的视频，不整页刷新
+    (function () {
+      function poll() {
+        fetch("/previews/manifest.json?_=" + Date.now(), { cache: "no-store" })
+          .then(function (r) { return r.ok ? r.json() : {}; })
+          .then(function (manifest) {
+            Object.keys(manifest).forEach(function (name) {
+              var v = document.querySelector('video[data-name="' + name + '"]');
+              var ts = String(manifest[name]);
+              if (v && v.dataset.ts !== ts) {
+                v.dataset.ts = ts;
+                v.src = "/previews/" + name + ".mp4?ts=" + ts;
+              }
+            });
+          })
+          .catch(function () {})
+          .then(function () { setTimeout(poll, 1000); });
+      }
+      poll();
+    })();
+  </script>
 </body>
 </html>
-"""
+""")
 
-def make_card(name: str, src_name: str, scene_name: str, ts: int) -> str:
-    return f"""
+# 卡片骨架只解析一次；用户提供的名字在构造 Target 时已 html.escape 并缓存
+_CARD_TMPL = """
     <div class="card">
       <header>
-        <div class="title">{name}</div>
-        <div class="meta"><code>{src_name}</code> · <code>{scene_name}</code></div>
+        <div class="title">%s</div>
+        <div class="meta"><code>%s</code> · <code>%s</code></div>
       </header>
       <div class="player">
-        <video src="/previews/{name}.mp4?ts={ts}" controls autoplay loop muted playsinline></video>
+        <video data-name="%s" data-ts="%d" src="/previews/%s.mp4?ts=%d" controls autoplay loop muted playsinline></video>
       </div>
     </div>
     """
 
-def write_dashboard(html_path: Path, targets: List[Target], port: int, log_dir: Path):
-    ts = int(time.time())
-    cards = "\n".join([make_card(t.name, os.path.basename(t.src), t.scene, ts) for t in targets])
-    html = DASHBOARD_TEMPLATE.format(cards=cards, port=port, log_dir=str(log_dir))
-    html_path.write_text(html, encoding="utf-8")
-
-def parse_targets(args) -> List[Target]:
+def make_card(t: Target, ts: int) -> str:
+    return _CARD_TMPL % (t.name_html, t.src_html, t.scene_html, t.name_html, ts, t.name_html, ts)
+
+def write_dashboard(html_path: Path, targets: List[Target], port: int, log_dir: str):
+    ts = int(time.time() * 1000)
+    cards = "\n".join([make_card(t, ts) for t in targets])
+    html = DASHBOARD_TEMPLATE.substitute(cards=cards, port=port, log_dir=escape(log_dir))
+    tmp = html_path.with_suffix(".html.tmp")
+    tmp.write_text(html, encoding="utf-8")
+    os.replace(tmp, html_path)
+
+_manifest: Dict[str, int] = {}   # name -> 预览更新时间戳（毫秒）
+_manifest_lock = Lock()
+
+def update_manifest(manifest_path: Path, name: str):
+    with _manifest_lock:
+        _manifest[name] = int(time.time() * 1000)
+        tmp = manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_manifest, f)
+        os.replace(tmp, manifest_path)
+
+def parse_targets(args, previews_dir: Path, logs_dir: Path) -> List[Target]:
     targets: List[Target] = []
-    previews_dir = Path.cwd() / "previews"
-    logs_dir = Path.cwd() / "logs"
     previews_dir.mkdir(parents=True, exist_ok=True)
     logs_dir.mkdir(parents=True, exist_ok=True)
 
@@ -258,58 +595,74 @@ def parse_targets(args) -> List[Target]:
 
     return targets
 
+# 正则作用于完整路径，可跨越任意层目录（glob 的 * 不跨越分隔符，只能忽略直接子项）。
+# 编辑器临时文件不放进忽略列表：只要改名事件的任一端路径命中忽略规则，watchdog 就会丢弃整个事件，
+# 会漏掉 "写 foo.py.tmp 再改名为 foo.py" 这种原子保存；它们本身也不匹配 .py 结尾
+WATCH_REGEXES = [r".*\.py$"]
+WATCH_IGNORE_REGEXES = [
+    r".*[/\\](" + "|".join(re.escape(d) for d in sorted(SKIP_DIRS)) + r")[/\\].*",
+]
+
 class PyChangeHandler:
     def __init__(self, targets: List[Target], rebuild_fn_map: Dict[str, callable], debounce=0.35):
-        from watchdog.events import FileSystemEventHandler
-        class _Handler(FileSystemEventHandler):
-            pass
-        self.HandlerBase = _Handler
         self.targets = targets
+        # 事件路径与监听根目录同源（均已 resolve），预先规范化成前缀字符串。
+        # 所有根目录编译成一个正则：按长度降序排列，匹配结果即最深的根目录；
+        # 该根目录映射到自身及所有祖先根目录上的目标（嵌套目录下的变更对外层目标同样可见）
+        roots: Dict[str, List[str]] = {}
+        for t in targets:
+            roots.setdefault(_norm_path(str(t.root_dir)) + os.sep, []).append(t.name)
+        ordered = sorted(roots, key=len, reverse=True)
+        self._root_pat = re.compile("|".join(re.escape(r) for r in ordered))
+        self._root_to_targets: Dict[str, frozenset] = {
+            r: frozenset(name for other in ordered if r.startswith(other) for name in roots[other])
+            for r in ordered
+        }
         self.rebuild_fn_map = rebuild_fn_map
         self.debounce = debounce
-        self._last: Dict[str, float] = {}
+        self._events: Queue = Queue()
 
-    def build(self):
-        handler = self.HandlerBase()
-
-        def on_change(path: str):
-            p = Path(path)
-            if p.suffix.lower() != ".py":
-                return
-            fired = set()
-            for t in self.targets:
+    def _consume(self):
+        # watchdog 线程只负责入队；这里把一次保存产生的一串事件（创建/修改/改名）攒成一批，
+        # 直到静默 debounce 秒，再去重、匹配目标，每个目标只触发一次重建
+        while True:
+            batch = {self._events.get()}
+            while True:
                 try:
-                    if p.resolve().is_relative_to(t.root_dir):
-                        key = t.name
-                        now = time.time()
-                        if now - self._last.get(key, 0.0) < self.debounce:
-                            continue
-                        self._last[key] = now
-                        fired.add(t.name)
-                        self.rebuild_fn_map[t.name]()
-                except Exception:
-                    try:
-                        if str(p.resolve()).startswith(str(t.root_dir)):
-                            key = t.name
-                            now = time.time()
-                            if now - self._last.get(key, 0.0) < self.debounce:
-                                continue
-                            self._last[key] = now
-                            fired.add(t.name)
-                            self.rebuild_fn_map[t.name]()
-                    except Exception:
-                        pass
-            if fired:
-                info("触发重建：" + ", ".join(sorted(fired)))
+                    batch.add(self._events.get(timeout=self.debounce))
+                except Empty:
+                    break
+            dirty = set()
+            for p in {_norm_path(p) for p in batch}:
+                m = self._root_pat.match(p)
+                if m:
+                    dirty |= self._root_to_targets[m.group(0)]
+            if not dirty:
+                continue
+            info("触发重建：" + ", ".join(sorted(dirty)))
+            for name in sorted(dirty):
+                try:
+                    self.rebuild_fn_map[name]()
+                except Exception as e:
+                    err(f"[{name}] 提交重建失败：{e}")
+
+    def build(self):
+        from watchdog.events import RegexMatchingEventHandler
+        # 由 watchdog 在分发前按正则过滤，缓存/版本库/虚拟环境里的变更不会进入回调
+        handler = RegexMatchingEventHandler(
+            regexes=WATCH_REGEXES,
+            ignore_regexes=WATCH_IGNORE_REGEXES,
+            ignore_directories=True,
+            case_sensitive=False,
+        )
 
         def _on_any(event):
-            try:
-                if hasattr(event, "src_path"):
-                    on_change(event.src_path)
-                if hasattr(event, "dest_path"):
-                    on_change(event.dest_path)
-            except Exception:
-                pass
+            self._events.put(event.src_path)
+            dest = getattr(event, "dest_path", None)
+            if dest:
+                self._events.put(dest)
+
+        Thread(target=self._consume, daemon=True).start()
 
         handler.on_modified = _on_any
         handler.on_created  = _on_any
@@ -317,21 +670,26 @@ class PyChangeHandler:
         handler.on_deleted  = _on_any
         return handler
 
+def watch_roots(targets: List[Target]) -> List[Path]:
+    # 去重并剔除被其它根目录包含的子目录：父目录递归监听已覆盖子目录
+    roots = sorted({t.root_dir.resolve() for t in targets}, key=lambda r: len(r.parts))
+    kept: List[Path] = []
+    for r in roots:
+        if not any(r.is_relative_to(x) for x in kept):
+            kept.append(r)
+    return kept
+
 def start_watchdog_observers(targets: List[Target], handler) -> List:
     from watchdog.observers import Observer
-    observers = []
-    for t in targets:
-        obs = Observer()
-        obs.schedule(handler, str(t.root_dir), recursive=True)
-        obs.start()
-        ok(f"[watch] {t.name} 监听目录：{t.root_dir}")
-        observers.append(obs)
-    return observers
+    obs = Observer()
+    for r in watch_roots(targets):
+        obs.schedule(handler, str(r), recursive=True)
+        names = ", ".join(t.name for t in targets if t.root_dir.resolve().is_relative_to(r))
+        ok(f"[watch] {names} 监听目录：{r}")
+    obs.start()
+    return [obs]
 
 def main():
-    ensure_deps()
-    from livereload import Server
-
     parser = argparse.ArgumentParser(description="Manim 多场景实时预览")
     parser.add_argument("--target", action="append", default=[],
                         help="指定一个监看目标，可多次： file.py:SceneName ；或 file.py（自动检测第一个 Scene）")
@@ -344,50 +702,140 @@ def main():
                         help="不自动打开浏览器")
     parser.add_argument("--verbose", action="store_true",
                         help="显示 Manim 调试日志（-v DEBUG）")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--subprocess", action="store_true",
+                      help="每次渲染启动独立的 manim 子进程（默认在本进程内复用已导入的 manim）")
+    mode.add_argument("--worker", action="store_true",
+                      help="每个目标启动一个常驻 manim 子进程，通过 stdin 发送渲染请求")
     args = parser.parse_args()
 
+    # 重量级依赖在解析参数之后再导入，--help / 参数错误时无需加载 livereload、watchdog
+    ensure_deps()
+    from livereload import Server
+
     if not args.target:
         warn("未指定 --target，默认尝试 demo.py（自动检测场景）。")
         args.target = ["demo.py"]
 
-    targets = parse_targets(args)
+    # 工作目录及其派生路径只计算一次，重建闭包直接复用
+    cwd = Path.cwd()
+    logs_dir = cwd / "logs"
+    previews_dir = cwd / "previews"
+    dashboard = cwd / "index.html"
+    manifest_path = previews_dir / "manifest.json"
+
+    targets = parse_targets(args, previews_dir, logs_dir)
+    write_dashboard(dashboard, targets, args.port, str(logs_dir))
+
+    # manim 渲染是 CPU 密集的子进程（或在 _manim_lock 下串行的进程内渲染），线程池只负责调度
+    from concurrent.futures import ThreadPoolExecutor
+    pool = ThreadPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 2))
 
-    dashboard = Path.cwd() / "index.html"
-    write_dashboard(dashboard, targets, args.port, Path.cwd() / "logs")
+    def render_and_publish(t: Target, digest: Optional[bytes] = None) -> bool:
+        if digest is None:
+            try:
+                digest = source_digest(t)
+            except OSError as e:
+                warn(f"[{t.name}] 读取源文件失败：{e}")
+                return False
+        ok_render = render_target(t, args.verbose, args.subprocess)
+        if ok_render:
+            t.last_hash = digest   # 失败时不记录，下次保存会重试
+            update_manifest(manifest_path, t.name)
+        return ok_render
+
+    shutdown = Event()
+    observers: List = []
+
+    def _on_signal(signum, frame):
+        # 只有第一次信号走正常清理；之后恢复默认处理，再按一次 Ctrl-C 即可强制结束
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        shutdown.set()
+
+    def _teardown():
+        info("正在退出…")
+        for obs in observers:
+            obs.stop()
+        for obs in observers:
+            obs.join()
+        pool.shutdown(wait=False, cancel_futures=True)
+        for t in targets:
+            stop_worker(t)
+        sys.stdout.flush()
+        # 线程池的线程不是守护线程，正常返回会在解释器退出时等进行中的渲染跑完
+        os._exit(0)
+
+    # 在首次渲染之前安装：首次渲染可能很久，期间也要能退出
+    signal.signal(signal.SIGINT, _on_signal)
+    signal.signal(signal.SIGTERM, _on_signal)
+    # POSIX 上阻塞等待可被信号打断，主线程无需轮询；Windows 上锁等待不响应 Ctrl-C，只能定期醒来
+    wait_timeout = 1.0 if os.name == "nt" else None
+
+    if args.worker:
+        for t in targets:
+            start_worker(t)
 
     info("首次渲染所有目标…")
-    for t in targets:
-        render_target(t, args.verbose)
+    # 不阻塞在 pool.map 上（future 的等待不会因信号返回），而是和 shutdown 一起等
+    first = [pool.submit(render_and_publish, t) for t in targets]
+    while not all(f.done() for f in first):
+        if shutdown.wait(0.1):
+            _teardown()
 
+    # 预览视频的更新由页面轮询 manifest.json 完成；livereload 只负责 index.html 本身
     server = Server()
-    for t in targets:
-        server.watch(str(t.preview_path))
     server.watch(str(dashboard))
 
     url = f"http://127.0.0.1:{args.port}/index.html"
     if not args.no_open:
         try:
+            import webbrowser
             webbrowser.open(url, new=2)
             info(f"已请求打开浏览器：{url}")
         except Exception as e:
             warn(f"自动打开浏览器失败：{e}，请手动访问：{url}")
 
     rebuild_fn_map: Dict[str, callable] = {}
-    debounce = 0.35
     for t in targets:
         def make_rebuild(tt: Target):
+            def _rebuild_once():
+                try:
+                    digest = source_digest(tt)
+                except OSError as e:
+                    warn(f"[{tt.name}] 读取源文件失败：{e}")
+                    return
+                if digest == tt.last_hash:
+                    info(f"[{tt.name}] 源码内容未变化，跳过渲染。")
+                    return
+                info(f"[{tt.name}] 检测到变更，开始渲染…")
+                if not render_and_publish(tt, digest):
+                    warn(f"[{tt.name}] 渲染失败（保留上次预览）。详见日志：{tt.log_path}")
+
             def _rebuild():
+                # 渲染期间新到的请求只置 pending，本轮结束后再重新排队一次（排在其他目标之后），
+                # 同一目标在线程池里最多只有一个任务，不会占着线程等锁而阻塞其他目标
+                try:
+                    _rebuild_once()
+                except Exception as e:
+                    err(f"[{tt.name}] 重建出错：{e}")
+                finally:
+                    # 放在 finally 里：场景代码抛出 SystemExit 等 BaseException 时也必须复位标志
+                    with tt.lock:
+                        resubmit = tt.rebuild_pending
+                        tt.rebuild_pending = False
+                        tt.rebuild_running = resubmit
+                    if resubmit:
+                        pool.submit(_rebuild)
+
+            def _submit():
                 with tt.lock:
-                    now = time.time()
-                    if now - tt.last_build_t < debounce:
+                    if tt.rebuild_running:
+                        tt.rebuild_pending = True
                         return
-                    tt.last_build_t = now
-                info(f"[{tt.name}] 检测到变更，开始渲染…")
-                ok_render = render_target(tt, args.verbose)
-                write_dashboard(dashboard, targets, args.port, Path.cwd() / "logs")
-                if not ok_render:
-                    warn(f"[{tt.name}] 渲染失败（保留上次预览）。详见日志：{tt.log_path}")
-            return _rebuild
+                    tt.rebuild_running = True
+                pool.submit(_rebuild)
+            return _submit
         rebuild_fn_map[t.name] = make_rebuild(t)
 
     py_handler = PyChangeHandler(targets, rebuild_fn_map).build()
@@ -401,15 +849,12 @@ def main():
     server_thread = Thread(target=run_server, daemon=True)
     server_thread.start()
 
-    try:
-        while True:
-            time.sleep(1.0)
-    except KeyboardInterrupt:
-        info("正在退出…")
-        for obs in observers:
-            obs.stop()
-        for obs in observers:
-            obs.join()
+    while not shutdown.wait(wait_timeout):
+        pass
+    _teardown()
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == [WORKER_FLAG]:
+        worker_main()
+    else:
+        main()